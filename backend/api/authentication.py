@@ -0,0 +1,41 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+DENORMALIZED_USER_FIELDS = ('shopping_cart_version', 'recipes_count',
+                            'subscribers_count')
+
+
+def token_cache():
+    return caches[settings.TOKEN_CACHE_ALIAS]
+
+
+def token_cache_key(key):
+    return f'auth-token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def forget_tokens(keys):
+    token_cache().delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        cached = token_cache().get(cache_key)
+        if cached is not None:
+            return cached
+        try:
+            token = self.get_model().objects.select_related('user').defer(
+                *(f'user__{field}' for field in DENORMALIZED_USER_FIELDS)
+            ).get(key=key)
+        except self.get_model().DoesNotExist:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        token_cache().set(cache_key, (token.user, token),
+                          settings.TOKEN_CACHE_TTL)
+        return token.user, token
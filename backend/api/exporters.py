@@ -0,0 +1,57 @@
+import csv
+import json
+
+from .pdf import render_shopping_list
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def ingredient_fields(ingredient):
+    return (ingredient['ingredient__name'],
+            ingredient['ingredient__measurement_unit'],
+            ingredient['total_amount'])
+
+
+def export_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('Ингредиент', 'Единицы измерения', 'Количество'))
+    for ingredient in ingredients:
+        yield writer.writerow(ingredient_fields(ingredient))
+
+
+def export_txt(ingredients):
+    for ingredient in ingredients:
+        name, unit, amount = ingredient_fields(ingredient)
+        yield f'{name} ({unit}) - {amount}\n'
+
+
+def export_json(ingredients):
+    yield '['
+    separator = ''
+    for ingredient in ingredients:
+        name, unit, amount = ingredient_fields(ingredient)
+        yield separator + json.dumps(
+            {'name': name, 'measurement_unit': unit, 'amount': amount},
+            ensure_ascii=False)
+        separator = ','
+    yield ']'
+
+
+EXPORT_FORMATS = {
+    'pdf': ('application/pdf', None),
+    'csv': ('text/csv; charset=utf-8', export_csv),
+    'txt': ('text/plain; charset=utf-8', export_txt),
+    'json': ('application/json', export_json),
+}
+
+
+def write_shopping_list(ingredients, export_format, output):
+    exporter = EXPORT_FORMATS[export_format][1]
+    if exporter is None:
+        render_shopping_list(ingredients, output)
+        return
+    for chunk in exporter(ingredients):
+        output.write(chunk.encode())
@@ -0,0 +1,91 @@
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+request_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.queries = 0
+        self.statements = Counter()
+        self.active = set()
+
+    def server_timing(self, total):
+        parts = [f'db;dur={self.durations["db"]:.1f};'
+                 f'desc="{self.queries} queries"']
+        parts.extend(f'{name};dur={duration:.1f}'
+                     for name, duration in self.durations.items()
+                     if name != 'db')
+        parts.append(f'total;dur={total:.1f}')
+        return ', '.join(parts)
+
+
+@contextmanager
+def timing(name):
+    metrics = request_metrics.get()
+    if metrics is None or name in metrics.active:
+        yield
+        return
+    metrics.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.durations[name] += (time.perf_counter() - started) * 1000
+        metrics.active.discard(name)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = request_metrics.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            metrics.durations['db'] += (time.perf_counter() - started) * 1000
+            metrics.queries += 1
+            metrics.statements[sql] += 1
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = request_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(record_query):
+                response = self.get_response(request)
+        finally:
+            request_metrics.reset(token)
+        total = (time.perf_counter() - started) * 1000
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing(total)
+        if (total >= settings.SLOW_REQUEST_MS
+                or metrics.queries >= settings.SLOW_REQUEST_QUERIES):
+            self.log_slow_request(request, response, metrics, total)
+        return response
+
+    def log_slow_request(self, request, response, metrics, total):
+        repeated = '\n'.join(
+            f'  {count} x {sql}'
+            for sql, count in metrics.statements.most_common(
+                settings.SLOW_REQUEST_TOP_QUERIES)
+            if count > 1)
+        logger.warning(
+            'Медленный запрос %s %s: %s, %.1f мс, %d SQL-запросов '
+            '(%.1f мс)%s',
+            request.method, request.get_full_path(), response.status_code,
+            total, metrics.queries, metrics.durations['db'],
+            f'\nПовторяющиеся запросы:\n{repeated}' if repeated else '')
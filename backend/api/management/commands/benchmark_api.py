@@ -0,0 +1,148 @@
+import json
+import platform
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                            ShoppingListItem, Tag)
+from users.models import CustomUser, Subscription
+
+COUNTED_MODELS = (CustomUser, Recipe, Ingredient, Tag, Favorite,
+                  ShoppingCart, ShoppingListItem, Subscription)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def endpoints(recipe, ingredient, tag):
+    prefix = ingredient.name[:3]
+    return (
+        ('recipes_anonymous', False, '/api/recipes/?limit=6'),
+        ('recipes', True, '/api/recipes/?limit=6'),
+        ('recipes_by_tag', True, f'/api/recipes/?limit=6&tags={tag.slug}'),
+        ('recipes_favorited', True, '/api/recipes/?limit=6&is_favorited=1'),
+        ('recipes_in_cart', True,
+         '/api/recipes/?limit=6&is_in_shopping_cart=1'),
+        ('recipes_cursor', True, '/api/recipes/?limit=6&pagination=cursor'),
+        ('recipes_search', True,
+         f'/api/recipes/?limit=6&search={recipe.name.split()[0]}'),
+        ('recipe_detail', True, f'/api/recipes/{recipe.id}/'),
+        ('tags', False, '/api/tags/'),
+        ('ingredients_search', False, f'/api/ingredients/?name={prefix}'),
+        ('users_me', True, '/api/users/me/'),
+        ('subscriptions', True,
+         '/api/users/subscriptions/?limit=6&recipes_limit=3'),
+        ('shopping_list', True, '/api/recipes/shopping_list/'),
+        ('download_shopping_cart', True,
+         '/api/recipes/download_shopping_cart/'),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Замер задержек и числа SQL-запросов основных эндпоинтов API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Число запросов к каждому эндпоинту')
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Число прогревочных запросов, не попадающих в отчёт')
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл для JSON-отчёта')
+        parser.add_argument(
+            '--compare',
+            help='JSON-отчёт предыдущего прогона для сравнения')
+        parser.add_argument(
+            '--only', nargs='+',
+            help='Замерить только указанные эндпоинты')
+
+    def handle(self, *args, **options):
+        user = (CustomUser.objects.filter(shopping_cart__isnull=False,
+                                          subscriptions__isnull=False)
+                .order_by('id').first())
+        recipe = Recipe.objects.order_by('id').first()
+        ingredient = Ingredient.objects.order_by('id').first()
+        tag = Tag.objects.order_by('id').first()
+        if None in (user, recipe, ingredient, tag):
+            raise CommandError(
+                'Недостаточно данных, сначала выполните generate_data')
+        host = next((host for host in settings.ALLOWED_HOSTS
+                     if host != '*'), 'testserver').lstrip('.')
+        anonymous = APIClient(SERVER_NAME=host)
+        authenticated = APIClient(SERVER_NAME=host)
+        authenticated.force_authenticate(user)
+        results = {}
+        for name, authorized, path in endpoints(recipe, ingredient, tag):
+            if options['only'] and name not in options['only']:
+                continue
+            client = authenticated if authorized else anonymous
+            results[name] = self.measure(
+                client, path, options['repeat'], options['warmup'])
+            self.stdout.write(
+                f'{name:24} {results[name]["p50_ms"]:8.2f} мс p50 '
+                f'{results[name]["p95_ms"]:8.2f} мс p95 '
+                f'{results[name]["queries"]:4} запросов')
+        report = {
+            'environment': {
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'machine': platform.platform(),
+                'repeat': options['repeat'],
+                'rows': {model._meta.label: model.objects.count()
+                         for model in COUNTED_MODELS},
+            },
+            'endpoints': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self.compare(options['compare'], results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Отчёт сохранён в {options["output"]}'))
+
+    def measure(self, client, path, repeat, warmup):
+        for _ in range(warmup):
+            client.get(path)
+        timings = []
+        queries = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = client.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context.captured_queries))
+        if response.status_code >= 400:
+            raise CommandError(f'{path}: ответ {response.status_code}')
+        return {
+            'path': path,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 0.5), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'queries': max(queries),
+        }
+
+    def compare(self, path, results):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)['endpoints']
+        self.stdout.write(f'Сравнение с {path}:')
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before = baseline[name]
+            self.stdout.write(
+                f'{name:24} p50 {before["p50_ms"]:8.2f} -> '
+                f'{result["p50_ms"]:8.2f} мс, p95 {before["p95_ms"]:8.2f} '
+                f'-> {result["p95_ms"]:8.2f} мс, запросов '
+                f'{before["queries"]} -> {result["queries"]}')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api.response_cache import response_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Статистика попаданий в кеш ответов для анонимных пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счётчики после вывода')
+
+    def handle(self, *args, **options):
+        stats = response_cache_stats(reset=options['reset'])
+        hits = stats['hits'] + stats['coalesced']
+        total = hits + stats['misses']
+        self.stdout.write(
+            f'Попаданий: {stats["hits"]}, '
+            f'дождались чужого расчёта: {stats["coalesced"]}, '
+            f'промахов: {stats["misses"]}')
+        if total:
+            self.stdout.write(self.style.SUCCESS(
+                f'Доля попаданий: {hits / total:.1%}'))
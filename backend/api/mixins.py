@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes.versions import get_version
+
+from .instrumentation import timing
+from .response_cache import get_or_compute, response_cache_key
+
+
+class ConditionalGetMixin:
+    version_name = None
+
+    def get_version(self, request):
+        if not hasattr(self, 'data_version'):
+            self.data_version = get_version(self.version_name)
+        return self.data_version
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        version = self.get_version(request)
+        if version is None:
+            return handler(request, *args, **kwargs)
+        etag = quote_etag(f'{self.version_name}-{version}')
+        last_modified = version // 10 ** 9
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
+
+
+class TimedViewMixin:
+    def dispatch(self, request, *args, **kwargs):
+        with timing('view'):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class TimedSerializerMixin:
+    def to_representation(self, instance):
+        with timing('serializer'):
+            return super().to_representation(instance)
+
+
+class AnonymousCacheMixin:
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated or not settings.RESPONSE_CACHE_TTL:
+            return handler(request, *args, **kwargs)
+
+        def compute():
+            response = handler(request, *args, **kwargs)
+            return response.status_code, response.data
+
+        key = response_cache_key(request, self.get_version(request))
+        (status_code, data), result = get_or_compute(key, compute)
+        response = Response(data, status=status_code)
+        response['X-Cache'] = result
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
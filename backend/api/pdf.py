@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONT_NAME = 'DejaVuSerif-Bold'
+FONT_PATH = Path(__file__).resolve().parent / 'DejaVuSerif-Bold.ttf'
+FONT_SIZE = 14
+LEFT_MARGIN = 100
+FIRST_LINE = 670
+PAGE_TOP = 750
+PAGE_BOTTOM = 50
+LINE_HEIGHT = 20
+
+
+def register_fonts():
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def pdf_drawer(pdf, ingredients):
+    text = pdf.beginText(LEFT_MARGIN, FIRST_LINE)
+    text.setFont(FONT_NAME, FONT_SIZE, leading=LINE_HEIGHT)
+    for ingredient in ingredients:
+        name = ingredient['ingredient__name']
+        unit = ingredient['ingredient__measurement_unit']
+        text.textLine(f'{name} ({unit}) - {ingredient["total_amount"]} ')
+        if text.getY() < PAGE_BOTTOM:
+            pdf.drawText(text)
+            pdf.showPage()
+            text = pdf.beginText(LEFT_MARGIN, PAGE_TOP)
+            text.setFont(FONT_NAME, FONT_SIZE, leading=LINE_HEIGHT)
+    pdf.drawText(text)
+
+
+def render_shopping_list(ingredients, output):
+    pdf = canvas.Canvas(output)
+    pdf_drawer(pdf, ingredients)
+    pdf.save()
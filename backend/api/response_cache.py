@@ -0,0 +1,71 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+STATS_KEYS = {name: f'response-cache:{name}'
+              for name in ('hits', 'misses', 'coalesced')}
+
+
+def response_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def response_cache_key(request, version):
+    query = '&'.join(
+        f'{name}={value}'
+        for name in sorted(request.query_params)
+        for value in sorted(request.query_params.getlist(name))
+        if value != '')
+    raw = f'{request.get_host()}{request.path}?{query}'
+    return (f'response:{version}:'
+            f'{hashlib.sha256(raw.encode()).hexdigest()}')
+
+
+def count(name):
+    cache = response_cache()
+    key = STATS_KEYS[name]
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def response_cache_stats(reset=False):
+    cache = response_cache()
+    stats = {name: cache.get(key, 0) for name, key in STATS_KEYS.items()}
+    if reset:
+        cache.delete_many(list(STATS_KEYS.values()))
+    return stats
+
+
+def get_or_compute(key, compute):
+    cache = response_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        count('hits')
+        return cached, 'HIT'
+    lock_key = f'{key}:lock'
+    timeout = settings.RESPONSE_CACHE_LOCK_TIMEOUT
+    if not cache.add(lock_key, 1, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            cached = cache.get(key)
+            if cached is not None:
+                count('coalesced')
+                return cached, 'HIT'
+            if cache.get(lock_key) is None:
+                break
+        count('misses')
+        return compute(), 'MISS'
+    try:
+        count('misses')
+        status_code, data = compute()
+        if status_code == 200:
+            cache.set(key, (status_code, data), settings.RESPONSE_CACHE_TTL)
+        return (status_code, data), 'MISS'
+    finally:
+        cache.delete(lock_key)
@@ -1,19 +1,48 @@
 import re
+from collections import Counter
 
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Manager, Prefetch, prefetch_related_objects
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_extra_fields.fields import Base64ImageField
-from rest_framework.fields import CharField, IntegerField
-from rest_framework.serializers import (ModelSerializer,
-                                        PrimaryKeyRelatedField,
+from rest_framework.fields import CharField, Field, IntegerField, ListField
+from rest_framework.relations import ManyRelatedField
+from rest_framework.serializers import (ListSerializer, ModelSerializer,
+                                        PrimaryKeyRelatedField, Serializer,
                                         SerializerMethodField, ValidationError)
 from rest_framework.validators import UniqueTogetherValidator
 
+from recipes.images import schedule_image_processing
 from recipes.models import (Favorite, Ingredient, IngredientForRecipe, Recipe,
-                            ShoppingCart, Tag)
+                            ShoppingCart, ShoppingListItem, Tag)
+from recipes.search import update_search_index
+from recipes.shopping_list import update_recipe_in_shopping_lists
+from recipes.snapshots import refresh_snapshot
 from users.models import CustomUser, Subscription
 
+from .instrumentation import timing
+from .mixins import TimedSerializerMixin
 
-class CustomUserSerializer(UserSerializer):
+BATCH_MAX_SIZE = 100
+
+
+class ImageVariantsField(Field):
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        request = self.context.get('request')
+        urls = {}
+        for name, path in variants.items():
+            url = default_storage.url(path)
+            urls[name] = request.build_absolute_uri(url) if request else url
+        return urls
+
+
+class CustomUserSerializer(TimedSerializerMixin, UserSerializer):
     is_subscribed = SerializerMethodField(read_only=True)
 
     class Meta:
@@ -22,6 +51,8 @@ class CustomUserSerializer(UserSerializer):
                   'first_name', 'last_name', 'is_subscribed')
 
     def get_is_subscribed(self, data):
+        if hasattr(data, 'is_subscribed'):
+            return data.is_subscribed
         user = self.context.get('request').user
         if user.is_authenticated:
             return Subscription.objects.filter(user=user, author=data).exists()
@@ -48,7 +79,6 @@ class CustomUserRegistrationSerializer(UserCreateSerializer):
 
 class SubscribeSerializer(CustomUserSerializer):
     recipes = SerializerMethodField()
-    recipes_count = SerializerMethodField()
 
     class Meta:
         model = CustomUser
@@ -58,39 +88,78 @@ class SubscribeSerializer(CustomUserSerializer):
                             'is_subscribed', 'recipes', 'recipes_count')
 
     def get_recipes(self, user):
-        recipes = Recipe.objects.filter(author=user)
-        recipes_limit = self.context.get('request').query_params.get(
-            'recipes_limit')
-        if recipes_limit:
-            recipes = recipes[:int(recipes_limit)]
+        if hasattr(user, 'limited_recipes'):
+            recipes = user.limited_recipes
+        else:
+            recipes = Recipe.objects.filter(author=user)
+            recipes_limit = self.context.get('request').query_params.get(
+                'recipes_limit')
+            if recipes_limit and recipes_limit.isdigit():
+                recipes = recipes[:int(recipes_limit)]
         serializer = ShortCartRecipeSerializer(recipes, many=True)
         return serializer.data
 
-    def get_recipes_count(self, user):
-        return user.recipes.count()
-
 
-class TagSerializer(ModelSerializer):
+class TagSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Tag
         fields = '__all__'
 
 
-class IngredientSerializer(ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Ingredient
         fields = '__all__'
 
 
+class BulkManyRelatedField(ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        pk_field = self.child_relation.get_queryset().model._meta.pk
+        pks = []
+        for item in data:
+            try:
+                pks.append(pk_field.to_python(item))
+            except (TypeError, DjangoValidationError):
+                self.child_relation.fail(
+                    'incorrect_type', data_type=type(item).__name__)
+        objects = self.child_relation.get_queryset().in_bulk(pks)
+        for pk in pks:
+            if pk not in objects:
+                self.child_relation.fail('does_not_exist', pk_value=pk)
+        return [objects[pk] for pk in pks]
+
+
+class IngredientPostListSerializer(ListSerializer):
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        ingredients = Ingredient.objects.in_bulk(
+            item['ingredient'] for item in items)
+        errors = []
+        for item in items:
+            ingredient = ingredients.get(item['ingredient'])
+            if ingredient is None:
+                errors.append({'id': [
+                    f'Ингредиента с id {item["ingredient"]} не существует']})
+            else:
+                errors.append({})
+                item['ingredient'] = ingredient
+        if any(errors):
+            raise ValidationError(errors)
+        return items
+
+
 class IngredientPostSerializer(ModelSerializer):
-    id = PrimaryKeyRelatedField(
-        source='ingredient',
-        queryset=Ingredient.objects.all())
+    id = IntegerField(source='ingredient')
     amount = IntegerField()
 
     class Meta:
         model = IngredientForRecipe
         fields = ('id', 'amount')
+        list_serializer_class = IngredientPostListSerializer
 
     def validate_amount(self, amount):
         if amount is None or amount <= 0 or amount >= 10000:
@@ -102,9 +171,8 @@ class IngredientPostSerializer(ModelSerializer):
 class RecipeCreateSerializer(ModelSerializer):
     ingredients = IngredientPostSerializer(
         many=True)
-    tags = PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True)
+    tags = BulkManyRelatedField(
+        child_relation=PrimaryKeyRelatedField(queryset=Tag.objects.all()))
     image = Base64ImageField(required=True)
 
     class Meta:
@@ -151,22 +219,74 @@ class RecipeCreateSerializer(ModelSerializer):
                 amount=amount))
         IngredientForRecipe.objects.bulk_create(ingredient_for_recipe_list)
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self.create_ingredients(ingredients, recipe)
+        update_search_index([recipe.id])
+        refresh_snapshot(recipe)
+        schedule_image_processing(recipe)
         return recipe
 
+    @staticmethod
+    def update_tags(tags, recipe):
+        tag_ids = {tag.id for tag in tags}
+        current_ids = set(recipe.tags.values_list('id', flat=True))
+        if current_ids - tag_ids:
+            recipe.tags.remove(*(current_ids - tag_ids))
+        if tag_ids - current_ids:
+            recipe.tags.add(*(tag_ids - current_ids))
+
+    @staticmethod
+    def update_ingredients(ingredients, recipe):
+        amounts = {item['ingredient'].id: item.get('amount')
+                   for item in ingredients}
+        old_amounts = Counter()
+        changed = []
+        removed = []
+        for row in IngredientForRecipe.objects.filter(
+                recipe=recipe).order_by('id'):
+            if (row.ingredient_id not in amounts
+                    or row.ingredient_id in old_amounts):
+                removed.append(row.id)
+            elif row.amount != amounts[row.ingredient_id]:
+                changed.append(row)
+            old_amounts[row.ingredient_id] += row.amount
+        for row in changed:
+            row.amount = amounts[row.ingredient_id]
+        added = [IngredientForRecipe(recipe=recipe,
+                                     ingredient_id=ingredient_id,
+                                     amount=amount)
+                 for ingredient_id, amount in amounts.items()
+                 if ingredient_id not in old_amounts]
+        if removed:
+            IngredientForRecipe.objects.filter(id__in=removed).delete()
+        if changed:
+            IngredientForRecipe.objects.bulk_update(changed, ['amount'])
+        if added:
+            IngredientForRecipe.objects.bulk_create(added)
+        if removed or changed or added:
+            update_recipe_in_shopping_lists(recipe.id, old_amounts)
+            return True
+        return False
+
+    @transaction.atomic
     def update(self, recipe, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
-        recipe.tags.clear()
-        recipe.ingredients.clear()
-        recipe.tags.set(tags)
-        self.create_ingredients(ingredients, recipe)
-        return super().update(recipe, validated_data)
+        self.update_tags(validated_data.pop('tags'), recipe)
+        ingredients_changed = self.update_ingredients(
+            validated_data.pop('ingredients'), recipe)
+        old_image = recipe.image.name
+        old_text = (recipe.name, recipe.text)
+        recipe = super().update(recipe, validated_data)
+        if ingredients_changed or (recipe.name, recipe.text) != old_text:
+            update_search_index([recipe.id])
+        refresh_snapshot(recipe)
+        if recipe.image.name != old_image:
+            schedule_image_processing(recipe)
+        return recipe
 
     def get_is_favorited(self, data):
         if self.context.get('request').user.is_authenticated:
@@ -188,50 +308,90 @@ class RecipeCreateSerializer(ModelSerializer):
         return RecipeReadSerializer(instance, context=self.context).data
 
 
-class RecipeReadSerializer(ModelSerializer):
+class RecipeReadListSerializer(ListSerializer):
+    def to_representation(self, data):
+        recipes = list(data.all() if isinstance(data, Manager) else data)
+        prefetch_related_objects(
+            [recipe for recipe in recipes if not recipe.snapshot],
+            'author', 'tags', Prefetch(
+                'ingredientforrecipe_set',
+                IngredientForRecipe.objects.select_related('ingredient')))
+        return super().to_representation(recipes)
+
+
+class RecipeReadSerializer(TimedSerializerMixin, ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = CustomUserSerializer(read_only=True)
     ingredients = SerializerMethodField()
     is_favorited = SerializerMethodField(read_only=True)
     is_in_shopping_cart = SerializerMethodField(read_only=True)
     image = Base64ImageField(required=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart', 'name',
-                  'image', 'text', 'cooking_time')
+                  'image', 'image_variants', 'text', 'cooking_time')
+        list_serializer_class = RecipeReadListSerializer
 
     def get_ingredients(self, data):
-        recipe = data
-        ingredient_for_recipe_objects = IngredientForRecipe.objects.filter(
-            recipe=recipe)
-
-        ingredients = []
-        for ingredient_for_recipe in ingredient_for_recipe_objects:
-            ingredient_info = {
-                'id': ingredient_for_recipe.ingredient.id,
-                'name': ingredient_for_recipe.ingredient.name,
-                'measurement_unit':
-                ingredient_for_recipe.ingredient.measurement_unit,
-                'amount': ingredient_for_recipe.amount
-            }
-            ingredients.append(ingredient_info)
-
-        return ingredients
+        return [
+            {'id': ingredient_for_recipe.ingredient.id,
+             'name': ingredient_for_recipe.ingredient.name,
+             'measurement_unit':
+             ingredient_for_recipe.ingredient.measurement_unit,
+             'amount': ingredient_for_recipe.amount}
+            for ingredient_for_recipe in data.ingredientforrecipe_set.all()
+        ]
 
     def get_is_favorited(self, data):
+        if hasattr(data, 'is_favorited'):
+            return data.is_favorited
         request = self.context.get('request')
         return (request and request.user.is_authenticated
                 and Favorite.objects.filter(user=request.user,
                                             recipe=data).exists())
 
     def get_is_in_shopping_cart(self, data):
+        if hasattr(data, 'is_in_shopping_cart'):
+            return data.is_in_shopping_cart
         request = self.context.get('request')
         return (request and request.user.is_authenticated
                 and ShoppingCart.objects.filter(user=request.user,
                                                 recipe=data).exists())
 
+    def get_is_subscribed(self, data):
+        if hasattr(data, 'is_subscribed'):
+            return data.is_subscribed
+        request = self.context.get('request')
+        return (request and request.user.is_authenticated
+                and Subscription.objects.filter(
+                    user=request.user, author_id=data.author_id).exists())
+
+    def from_snapshot(self, instance):
+        merged = {
+            **instance.snapshot,
+            'author': {**instance.snapshot['author'],
+                       'is_subscribed': self.get_is_subscribed(instance)},
+            'is_favorited': self.get_is_favorited(instance),
+            'is_in_shopping_cart': self.get_is_in_shopping_cart(instance),
+            'image': self.fields['image'].to_representation(instance.image),
+            'image_variants': self.fields['image_variants'].to_representation(
+                instance.image_variants),
+        }
+        return {field: merged[field] if field in merged
+                else getattr(instance, field)
+                for field in self.Meta.fields}
+
+    def to_representation(self, instance):
+        if instance.snapshot:
+            with timing('serializer'):
+                return self.from_snapshot(instance)
+        if hasattr(instance, 'is_subscribed'):
+            instance.author.is_subscribed = instance.is_subscribed
+        return super().to_representation(instance)
+
 
 class FavoriteOrShoppingCartSerializer(ModelSerializer):
     def to_representation(self, instance):
@@ -274,7 +434,27 @@ class ShoppingCartSerializer(FavoriteOrShoppingCartSerializer):
             message='Рецепт уже добавлен в список покупок')]
 
 
-class ShortCartRecipeSerializer(ModelSerializer):
+class RecipeIdsSerializer(Serializer):
+    recipes = ListField(
+        child=IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BATCH_MAX_SIZE)
+
+
+class ShoppingListItemSerializer(TimedSerializerMixin, ModelSerializer):
+    id = IntegerField(source='ingredient.id')
+    name = CharField(source='ingredient.name')
+    measurement_unit = CharField(source='ingredient.measurement_unit')
+    amount = IntegerField(source='total_amount')
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
+class ShortCartRecipeSerializer(TimedSerializerMixin, ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
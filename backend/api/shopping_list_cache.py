@@ -0,0 +1,88 @@
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+
+from .exporters import EXPORT_FORMATS, write_shopping_list
+
+FILENAME = 'shopping_cart'
+
+
+def cache_dir(user):
+    return Path(settings.SHOPPING_LIST_CACHE_DIR) / str(user.pk)
+
+
+def cache_path(user, export_format):
+    return cache_dir(user) / f'{user.shopping_cart_version}.{export_format}'
+
+
+def get_cached_shopping_list(user, export_format):
+    path = cache_path(user, export_format)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def store_shopping_list(user, export_format, ingredients):
+    path = cache_path(user, export_format)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temp_name = tempfile.mkstemp(dir=path.parent,
+                                             suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            write_shopping_list(ingredients, export_format, output)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+    remove_stale_versions(user)
+    evict_shopping_lists(keep=path)
+    return path
+
+
+def remove_stale_versions(user):
+    version = str(user.shopping_cart_version)
+    for entry in cache_dir(user).iterdir():
+        if entry.suffix != '.tmp' and entry.stem != version:
+            entry.unlink(missing_ok=True)
+
+
+def evict_shopping_lists(keep=None):
+    entries = []
+    total_size = 0
+    for entry in Path(settings.SHOPPING_LIST_CACHE_DIR).glob('*/*'):
+        if entry.suffix == '.tmp':
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        total_size += stat.st_size
+        if entry != keep:
+            entries.append((stat.st_mtime, stat.st_size, entry))
+    if total_size <= settings.SHOPPING_LIST_CACHE_MAX_SIZE:
+        return
+    for _, size, entry in sorted(entries):
+        entry.unlink(missing_ok=True)
+        total_size -= size
+        if total_size <= settings.SHOPPING_LIST_CACHE_MAX_SIZE:
+            break
+
+
+def shopping_list_response(path, export_format):
+    content_type = EXPORT_FORMATS[export_format][0]
+    if settings.SHOPPING_LIST_X_ACCEL_PREFIX:
+        response = HttpResponse(content_type=content_type)
+        relative_path = path.relative_to(settings.SHOPPING_LIST_CACHE_DIR)
+        response['X-Accel-Redirect'] = (
+            f'{settings.SHOPPING_LIST_X_ACCEL_PREFIX}'
+            f'{relative_path.as_posix()}')
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{FILENAME}.{export_format}"')
+    return response
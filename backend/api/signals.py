@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.models import CustomUser
+
+from .authentication import forget_tokens
+
+
+@receiver(post_save, sender=CustomUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        forget_tokens(Token.objects.filter(user=instance).values_list(
+            'key', flat=True))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    forget_tokens([instance.key])
@@ -0,0 +1,73 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, IngredientForRecipe, Recipe,
+                            ShoppingCart, Tag)
+from recipes.snapshots import update_snapshots
+from recipes.versions import get_version
+from users.models import CustomUser, Subscription
+
+RECIPES_URL = '/api/recipes/'
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class RecipeListQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [CustomUser.objects.create_user(
+            email=f'user{index}@example.org', username=f'user{index}',
+            first_name='Имя', last_name='Фамилия', password='password')
+            for index in range(3)]
+        tags = [Tag.objects.create(name=f'Тег {index}', slug=f'tag{index}',
+                                   color=f'#00000{index}')
+                for index in range(3)]
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {index}', measurement_unit='г')
+            for index in range(10))
+        for index in range(8):
+            recipe = Recipe.objects.create(
+                author=cls.users[index % 3], name=f'Рецепт {index}',
+                text='Описание', cooking_time=10, image='recipes/test.png')
+            recipe.tags.set(tags[:1 + index % 3])
+            IngredientForRecipe.objects.bulk_create(
+                IngredientForRecipe(recipe=recipe, amount=amount + 1,
+                                    ingredient=ingredients[
+                                        (index + amount) % 10])
+                for amount in range(4))
+            if index % 2:
+                Favorite.objects.create(user=cls.users[0], recipe=recipe)
+                ShoppingCart.objects.create(user=cls.users[0], recipe=recipe)
+        Subscription.objects.create(user=cls.users[0], author=cls.users[1])
+        get_version('recipes')
+
+    def setUp(self):
+        self.anonymous = APIClient()
+        self.authorized = APIClient()
+        self.authorized.force_authenticate(self.users[0])
+
+    def assert_list_queries(self, anonymous, authorized):
+        for client, number in ((self.anonymous, anonymous),
+                               (self.authorized, authorized)):
+            for limit in (2, 6):
+                with self.subTest(
+                        authorized=client is self.authorized, limit=limit):
+                    with self.assertNumQueries(number):
+                        response = client.get(RECIPES_URL,
+                                              {'limit': limit})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(response.data['results']), limit)
+
+    def test_list_with_snapshots(self):
+        update_snapshots(Recipe.objects.values_list('id', flat=True))
+        self.assert_list_queries(anonymous=4, authorized=3)
+
+    def test_list_without_snapshots(self):
+        self.assert_list_queries(anonymous=7, authorized=6)
+
+    def test_snapshot_matches_full_representation(self):
+        for client in (self.anonymous, self.authorized):
+            full = client.get(RECIPES_URL, {'limit': 8}).data['results']
+            update_snapshots(Recipe.objects.values_list('id', flat=True))
+            self.assertEqual(
+                client.get(RECIPES_URL, {'limit': 8}).data['results'], full)
+            Recipe.objects.update(snapshot={})
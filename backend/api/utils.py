@@ -1,25 +1,23 @@
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from rest_framework import status
 from rest_framework.response import Response
 
+from recipes.counters import bulk_change
+from recipes.models import Recipe
+from users.models import CustomUser
 
-def pdf_drawer(pdf, unit, ingredient_totals):
-    pdfmetrics.registerFont(TTFont(
-        'DejaVuSerif-Bold', 'DejaVuSerif-Bold.ttf'))
-    pdf.setFont('DejaVuSerif-Bold', 14)
-    pdf.drawString(100, 50, ' ')
-    y = 670
-    page_height = 800
-    for name, total_amount in ingredient_totals.items():
-        pdf.drawString(100, y, f'{name} ({unit}) - {total_amount} ')
-        y -= 20
-        if y < 50:
-            pdf.showPage()
-            y = page_height - 50
+from .serializers import RecipeIdsSerializer
 
 
+def lock_user(user):
+    list(CustomUser.objects.select_for_update()
+         .filter(pk=user.pk).values_list('pk', flat=True))
+
+
+@transaction.atomic
 def create_model_instance(request, instance, serializer_name):
+    lock_user(request.user)
     serializer = serializer_name(
         data={'user': request.user.id, 'recipe': instance.id, },
         context={'request': request})
@@ -28,10 +26,63 @@ def create_model_instance(request, instance, serializer_name):
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@transaction.atomic
 def delete_model_instance(request, model_name, instance, error_message):
+    lock_user(request.user)
     if not model_name.objects.filter(user=request.user,
                                      recipe=instance).exists():
         return Response({'errors': error_message},
                         status=status.HTTP_400_BAD_REQUEST)
     model_name.objects.filter(user=request.user, recipe=instance).delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def resolve_batch(request, model_name):
+    serializer = RecipeIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    recipe_ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+    lock_user(request.user)
+    found = dict(Recipe.objects.filter(id__in=recipe_ids).annotate(
+        added=Exists(model_name.objects.filter(
+            user=request.user, recipe=OuterRef('pk')))
+    ).values_list('id', 'added'))
+    return recipe_ids, found
+
+
+def batch_response(recipe_ids, found, changed_ids, changed, unchanged):
+    changed_ids = set(changed_ids)
+    return Response({'results': [
+        {'id': recipe_id,
+         'status': (changed if recipe_id in changed_ids
+                    else unchanged if recipe_id in found
+                    else 'not_found')}
+        for recipe_id in recipe_ids]})
+
+
+@transaction.atomic
+def create_model_instances(request, model_name, on_created=None):
+    recipe_ids, found = resolve_batch(request, model_name)
+    new_ids = [recipe_id for recipe_id in recipe_ids
+               if recipe_id in found and not found[recipe_id]]
+    if new_ids:
+        model_name.objects.bulk_create(
+            [model_name(user=request.user, recipe_id=recipe_id)
+             for recipe_id in new_ids],
+            ignore_conflicts=True)
+        if on_created is not None:
+            on_created(request.user, new_ids)
+    return batch_response(recipe_ids, found, new_ids, 'created', 'exists')
+
+
+@transaction.atomic
+def delete_model_instances(request, model_name, on_deleted=None):
+    recipe_ids, found = resolve_batch(request, model_name)
+    old_ids = [recipe_id for recipe_id in recipe_ids
+               if found.get(recipe_id)]
+    if old_ids:
+        if on_deleted is not None:
+            on_deleted(request.user, old_ids)
+        with bulk_change():
+            model_name.objects.filter(
+                user=request.user, recipe_id__in=old_ids).delete()
+    return batch_response(recipe_ids, found, old_ids, 'deleted', 'missing')
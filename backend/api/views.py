@@ -1,30 +1,40 @@
-from io import BytesIO
-
-from django.http import FileResponse
+from django.db.models import Exists, F, OuterRef, Prefetch, Value
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
-from reportlab.pdfgen import canvas
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import SAFE_METHODS
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
 from api.filters import IngredientFilter, RecipeFilter
+from recipes.counters import (add_recipes_to_favorites,
+                              remove_recipes_from_favorites)
+from recipes.ingredient_index import fuzzy_search, ingredient_index
 from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.shopping_list import add_recipes_to_cart, remove_recipes_from_cart
 from users.models import CustomUser, Subscription
 
-from .pagination import CustomPagination
+from .exporters import EXPORT_FORMATS
+from .instrumentation import timing
+from .mixins import AnonymousCacheMixin, ConditionalGetMixin, TimedViewMixin
+from .pagination import CustomPagination, KeysetPaginationMixin
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (CustomUserSerializer, FavoriteSerializer,
-                          IngredientForRecipe, IngredientSerializer,
-                          RecipeCreateSerializer, RecipeReadSerializer,
-                          ShoppingCartSerializer, SubscribeSerializer,
+                          IngredientSerializer, RecipeCreateSerializer,
+                          RecipeReadSerializer, ShoppingCartSerializer,
+                          ShoppingListItemSerializer, SubscribeSerializer,
                           TagSerializer)
-from .utils import create_model_instance, delete_model_instance, pdf_drawer
+from .shopping_list_cache import (get_cached_shopping_list,
+                                  shopping_list_response, store_shopping_list)
+from .utils import (create_model_instance, create_model_instances,
+                    delete_model_instance, delete_model_instances)
+
+DENORMALIZED_RECIPE_FIELDS = ('favorites_count', 'in_carts_count',
+                              'image_variants', 'snapshot')
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(TimedViewMixin, KeysetPaginationMixin, UserViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
     pagination_class = CustomPagination
@@ -57,11 +67,23 @@ class CustomUserViewSet(UserViewSet):
 
     @action(detail=False, methods=['get'],
             url_path='subscriptions',
-            pagination_class=CustomPagination)
+            pagination_class=CustomPagination,
+            cursor_ordering=('subscription_id',))
     def subscriptions(self, request):
-        user = request.user
-        subs = Subscription.objects.filter(user=user)
-        authors = [sub.author for sub in subs]
+        recipes = Recipe.objects.only(
+            'id', 'author_id', 'name', 'image', 'image_variants',
+            'cooking_time').order_by('name', 'id')
+        recipes_limit = request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            recipes = recipes[:int(recipes_limit)]
+        authors = CustomUser.objects.filter(
+            subscribers__user=request.user
+        ).annotate(
+            subscription_id=F('subscribers__id'),
+            is_subscribed=Value(True)
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+        ).order_by('subscription_id')
         paginated_queryset = self.paginate_queryset(authors)
         serializer = SubscribeSerializer(paginated_queryset,
                                          many=True,
@@ -69,30 +91,69 @@ class CustomUserViewSet(UserViewSet):
         return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(TimedViewMixin, ConditionalGetMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [IsAuthorOrReadOnly]
     pagination_class = None
+    version_name = 'tags'
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(TimedViewMixin, ConditionalGetMixin,
+                        ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [IsAuthorOrReadOnly]
     pagination_class = None
     filterset_class = IngredientFilter
+    version_name = 'ingredients'
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(self.search, request, name)
+
+    def search(self, request, name):
+        return Response(ingredient_index.search(name) or fuzzy_search(name))
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(TimedViewMixin, ConditionalGetMixin, AnonymousCacheMixin,
+                    KeysetPaginationMixin, ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = [IsAuthorOrReadOnly]
     http_method_names = ['get', 'post', 'patch', 'delete']
     filterset_class = RecipeFilter
+    version_name = 'recipes'
+    cursor_ordering = ('name', 'id')
+
+    def get_version(self, request):
+        if request.user.is_authenticated:
+            return None
+        return super().get_version(request)
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Recipe.objects.defer('search_document', 'search_vector')
+        if self.request.method not in SAFE_METHODS:
+            queryset = queryset.defer(*DENORMALIZED_RECIPE_FIELDS)
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Exists(Favorite.objects.filter(
+                    user=user, recipe=OuterRef('pk'))),
+                is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                    user=user, recipe=OuterRef('pk'))),
+                is_subscribed=Exists(Subscription.objects.filter(
+                    user=user, author=OuterRef('author'))))
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(
+            request, force=force or self.action == 'download_shopping_cart')
+
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeReadSerializer
@@ -123,31 +184,53 @@ class RecipeViewSet(ModelViewSet):
         return delete_model_instance(request, ShoppingCart,
                                      recipe, error_message)
 
+    @action(detail=False, methods=['post'], url_path='favorite',
+            url_name='favorite-batch', permission_classes=[IsAuthenticated])
+    def favorite_batch(self, request):
+        return create_model_instances(request, Favorite,
+                                      on_created=add_recipes_to_favorites)
+
+    @favorite_batch.mapping.delete
+    def delete_favorite_batch(self, request):
+        return delete_model_instances(
+            request, Favorite, on_deleted=remove_recipes_from_favorites)
+
+    @action(detail=False, methods=['post'], url_path='shopping_cart',
+            url_name='shopping-cart-batch',
+            permission_classes=[IsAuthenticated])
+    def shopping_cart_batch(self, request):
+        return create_model_instances(request, ShoppingCart,
+                                      on_created=add_recipes_to_cart)
+
+    @shopping_cart_batch.mapping.delete
+    def delete_shopping_cart_batch(self, request):
+        return delete_model_instances(request, ShoppingCart,
+                                      on_deleted=remove_recipes_from_cart)
+
     @action(detail=False, methods=['get'],
-            permission_classes=[IsAuthorOrReadOnly])
+            permission_classes=[IsAuthenticated])
     def download_shopping_cart(self, request):
-        shopping_cart_user = ShoppingCart.objects.filter(user=request.user)
-        ingredient_data = IngredientForRecipe.objects.filter(
-            recipe__in=shopping_cart_user.values_list('recipe', flat=True))
-
-        ingredient_totals = {}
-        for ingredient in ingredient_data:
-            name = ingredient.ingredient.name
-            amount = ingredient.amount
-            unit = ingredient.ingredient.measurement_unit
-
-            if name in ingredient_totals:
-                ingredient_totals[name] += amount
-            else:
-                ingredient_totals[name] = amount
-
-        buffer = BytesIO()
-        pdf = canvas.Canvas(buffer)
-        pdf_drawer(pdf, unit, ingredient_totals)
-        pdf.save()
-        buffer.seek(0)
-
-        response = FileResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = \
-            'attachment; filename="shopping_cart.pdf"'
-        return response
+        export_format = request.query_params.get('format', 'pdf').lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'errors': 'Доступные форматы: '
+                           f'{", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST)
+        request.user.refresh_from_db(fields=['shopping_cart_version'])
+        path = get_cached_shopping_list(request.user, export_format)
+        if path is None:
+            ingredients = request.user.shopping_list.values(
+                'ingredient__name', 'ingredient__measurement_unit',
+                'total_amount')
+            with timing('export'):
+                path = store_shopping_list(request.user, export_format,
+                                           ingredients.iterator())
+        return shopping_list_response(path, export_format)
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[IsAuthenticated])
+    def shopping_list(self, request):
+        serializer = ShoppingListItemSerializer(
+            request.user.shopping_list.select_related('ingredient'),
+            many=True)
+        return Response(serializer.data)
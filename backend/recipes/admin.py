@@ -1,8 +1,14 @@
 from django.contrib import admin
 from django.contrib.admin import display
 
+from backend_foodgram.paginators import EstimatedCountPaginator
+
+from .images import schedule_image_processing
 from .models import (Favorite, Ingredient, IngredientForRecipe, Recipe,
                      ShoppingCart, Tag)
+from .search import update_search_index
+from .shopping_list import recipe_amounts, update_recipe_in_shopping_lists
+from .snapshots import update_snapshots
 
 
 @admin.register(Tag)
@@ -18,33 +24,83 @@ class IngredientAdmin(admin.ModelAdmin):
     model = Ingredient
     list_display = ('name', 'measurement_unit')
     search_fields = ('name',)
-    list_filter = ('name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class IngredientForRecipeAdmin(admin.TabularInline):
     model = IngredientForRecipe
     list_display = ('recipe', 'ingredient', 'amount',)
+    autocomplete_fields = ('ingredient',)
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('ingredient')
 
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     model = Recipe
-    list_display = ('name', 'author', 'count_in_favorites')
-    list_filter = ('name', 'author', 'tags',)
+    list_display = ('name', 'author', 'count_in_favorites',
+                    'count_in_carts')
+    list_filter = ('tags',)
+    list_select_related = ('author',)
+    search_fields = ('name', 'author__username')
+    autocomplete_fields = ('author',)
+    ordering = ('-id',)
     inlines = [IngredientForRecipeAdmin]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            'search_document', 'search_vector')
 
-    @display(description='Сколько раз добавили в избранное')
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        obj.save(update_fields=[
+            field.name for field in Recipe._meta.concrete_fields
+            if field.editable and not field.primary_key])
+
+    def save_related(self, request, form, formsets, change):
+        old_amounts = recipe_amounts(form.instance.id) if change else None
+        super().save_related(request, form, formsets, change)
+        if old_amounts is not None:
+            update_recipe_in_shopping_lists(form.instance.id, old_amounts)
+        update_search_index([form.instance.id])
+        update_snapshots([form.instance.id])
+        if 'image' in form.changed_data:
+            schedule_image_processing(form.instance)
+
+    @display(description='Сколько раз добавили в избранное',
+             ordering='favorites_count')
     def count_in_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
+
+    @display(description='Сколько раз добавили в список покупок',
+             ordering='in_carts_count')
+    def count_in_carts(self, obj):
+        return obj.in_carts_count
 
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'recipe')
-    search_fields = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'recipe')
-    search_fields = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -5,3 +5,6 @@ class RecipesConfig(AppConfig):
     verbose_name = 'Рецепты'
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
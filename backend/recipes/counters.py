@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Recipe
+
+COUNTERS = (
+    ('recipes.Recipe', 'favorites_count', 'recipes.Favorite', 'recipe'),
+    ('recipes.Recipe', 'in_carts_count', 'recipes.ShoppingCart', 'recipe'),
+    ('users.CustomUser', 'recipes_count', 'recipes.Recipe', 'author'),
+    ('users.CustomUser', 'subscribers_count', 'users.Subscription',
+     'author'),
+)
+
+signals_muted = ContextVar('signals_muted', default=False)
+
+
+@contextmanager
+def bulk_change():
+    token = signals_muted.set(True)
+    try:
+        yield
+    finally:
+        signals_muted.reset(token)
+
+
+def change_counter(model, pks, field, delta):
+    model.objects.filter(pk__in=pks).update(
+        **{field: Greatest(F(field) + delta, Value(0))})
+
+
+def add_recipes_to_favorites(user, recipe_ids):
+    change_counter(Recipe, recipe_ids, 'favorites_count', 1)
+
+
+def remove_recipes_from_favorites(user, recipe_ids):
+    change_counter(Recipe, recipe_ids, 'favorites_count', -1)
+
+
+def actual_count(related_model, fk):
+    return Coalesce(Subquery(
+        related_model.objects.filter(**{fk: OuterRef('pk')})
+        .order_by()
+        .values(fk)
+        .annotate(total=Count('pk'))
+        .values('total')), Value(0))
+
+
+def reconcile_counters(get_model, dry_run=False, batch_size=1000):
+    drift = {}
+    for label, field, related_label, fk in COUNTERS:
+        model = get_model(label)
+        related_model = get_model(related_label)
+        drifted = model.objects.annotate(
+            actual=actual_count(related_model, fk)
+        ).exclude(**{field: F('actual')})
+        drift[f'{label}.{field}'] = drifted.count()
+        if dry_run:
+            continue
+        pks = list(drifted.values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            model.objects.filter(pk__in=pks[start:start + batch_size]).update(
+                **{field: actual_count(related_model, fk)})
+    return drift
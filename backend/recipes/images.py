@@ -0,0 +1,77 @@
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .models import Recipe
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'recipes/variants'
+IMAGE_VARIANTS = {
+    'thumbnail': {'size': (480, 480), 'format': 'JPEG', 'extension': 'jpg'},
+    'thumbnail_webp': {'size': (480, 480), 'format': 'WEBP',
+                       'extension': 'webp'},
+    'webp': {'size': (1600, 1600), 'format': 'WEBP', 'extension': 'webp'},
+}
+
+executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS,
+                              thread_name_prefix='recipe-images')
+
+
+def render_variant(image, size, image_format):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if image_format == 'JPEG' and variant.mode not in ('RGB', 'L'):
+        variant = variant.convert('RGB')
+    output = BytesIO()
+    variant.save(output, image_format, quality=82, optimize=True)
+    return output.getvalue()
+
+
+def generate_variants(recipe_id):
+    recipe = Recipe.objects.filter(id=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return
+    with recipe.image.open('rb') as source:
+        content = source.read()
+    digest = hashlib.sha256(content).hexdigest()[:32]
+    with Image.open(BytesIO(content)) as image:
+        image = ImageOps.exif_transpose(image)
+        variants = {}
+        for name, spec in IMAGE_VARIANTS.items():
+            path = f'{VARIANTS_DIR}/{digest}-{name}.{spec["extension"]}'
+            if not default_storage.exists(path):
+                path = default_storage.save(path, ContentFile(render_variant(
+                    image, spec['size'], spec['format'])))
+            variants[name] = path
+    updated = Recipe.objects.filter(
+        id=recipe_id, image=recipe.image.name
+    ).update(image_variants=variants)
+    if updated:
+        bump_version('recipes')
+
+
+def process_recipe_image(recipe_id):
+    close_old_connections()
+    try:
+        generate_variants(recipe_id)
+    except Exception:
+        logger.exception('Не удалось обработать изображение рецепта %s',
+                         recipe_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_image_processing(recipe):
+    Recipe.objects.filter(id=recipe.id).update(image_variants={})
+    recipe.image_variants = {}
+    transaction.on_commit(
+        lambda: executor.submit(process_recipe_image, recipe.id))
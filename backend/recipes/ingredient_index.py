@@ -0,0 +1,134 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Length, Lower, Replace
+
+from .models import Ingredient
+from .versions import get_version
+
+SIMILARITY_THRESHOLD = 0.3
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def normalize(name):
+    return name.casefold().replace('ё', 'е')
+
+
+def trigrams(name):
+    result = set()
+    for word in WORD_PATTERN.findall(normalize(name)):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+IndexData = namedtuple(
+    'IndexData', ('version', 'keys', 'rows', 'trigram_counts', 'postings'))
+
+
+def index_row(data, position):
+    pk, name, measurement_unit = data.rows[position]
+    return {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.data = IndexData(None, [], [], array('H'), {})
+        self.lock = threading.Lock()
+
+    def build(self, version):
+        entries = sorted(
+            (normalize(name), pk, name, measurement_unit)
+            for pk, name, measurement_unit
+            in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit').iterator())
+        trigram_counts = array('H')
+        postings = {}
+        for position, entry in enumerate(entries):
+            entry_trigrams = trigrams(entry[0])
+            trigram_counts.append(len(entry_trigrams))
+            for trigram in entry_trigrams:
+                postings.setdefault(trigram, array('I')).append(position)
+        self.data = IndexData(
+            version,
+            [entry[0] for entry in entries],
+            [entry[1:] for entry in entries],
+            trigram_counts,
+            postings)
+
+    def ensure_fresh(self):
+        version = get_version('ingredients')
+        if version != self.data.version:
+            with self.lock:
+                if version != self.data.version:
+                    self.build(version)
+        return self.data
+
+    def search(self, prefix, limit=None):
+        data = self.ensure_fresh()
+        keys = data.keys
+        prefix = normalize(prefix)
+        matches = []
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and keys[position].startswith(prefix):
+            matches.append(position)
+            position += 1
+        matches.sort(key=lambda position: (
+            keys[position] != prefix, len(keys[position]), keys[position]))
+        limit = limit or settings.INGREDIENT_SEARCH_LIMIT
+        return [index_row(data, position) for position in matches[:limit]]
+
+    def fuzzy_search(self, query, limit=None):
+        data = self.ensure_fresh()
+        query_trigrams = trigrams(query)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(data.postings.get(trigram, ()))
+        ranked = []
+        for position, common in shared.items():
+            similarity = common / (len(query_trigrams)
+                                   + data.trigram_counts[position] - common)
+            if similarity >= SIMILARITY_THRESHOLD:
+                ranked.append((-similarity, len(data.keys[position]),
+                               data.keys[position], position))
+        ranked.sort()
+        limit = limit or settings.INGREDIENT_SEARCH_LIMIT
+        return [index_row(data, entry[-1]) for entry in ranked[:limit]]
+
+
+ingredient_index = IngredientIndex()
+trigram_extension = {}
+
+
+def has_trigram_extension():
+    if connection.vendor != 'postgresql':
+        return False
+    if connection.alias not in trigram_extension:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            trigram_extension[connection.alias] = (
+                cursor.fetchone() is not None)
+    return trigram_extension[connection.alias]
+
+
+def fuzzy_search(query, limit=None):
+    if not has_trigram_extension():
+        return ingredient_index.fuzzy_search(query, limit)
+    normalized_query = normalize(query)
+    normalized_name = Replace(Lower('name'), Value('ё'), Value('е'))
+    return list(
+        Ingredient.objects.alias(normalized_name=normalized_name)
+        .filter(normalized_name__trigram_similar=normalized_query)
+        .annotate(similarity=TrigramSimilarity(
+            normalized_name, normalized_query))
+        .order_by('-similarity', Length('name'), 'name')
+        .values('id', 'name', 'measurement_unit')
+        [:limit or settings.INGREDIENT_SEARCH_LIMIT])
@@ -0,0 +1,56 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.storage import recipe_image_storage
+
+IMAGES_DIR = 'recipes'
+
+
+def stored_files(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name)
+    for directory in directories:
+        yield from stored_files(storage, os.path.join(path, directory))
+
+
+class Command(BaseCommand):
+    help = 'Удаление изображений, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Не удалять файлы моложе указанного числа секунд')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать файлы, которые будут удалены')
+
+    def handle(self, *args, **options):
+        referenced = set()
+        for image, variants in Recipe.objects.values_list(
+                'image', 'image_variants').iterator():
+            referenced.add(image)
+            referenced.update(variants.values())
+        threshold = time.time() - options['min_age']
+        removed = freed = 0
+        storage = recipe_image_storage
+        names = stored_files(storage, IMAGES_DIR) if storage.exists(
+            IMAGES_DIR) else ()
+        for name in names:
+            if name in referenced:
+                continue
+            if storage.get_modified_time(name).timestamp() > threshold:
+                continue
+            size = storage.size(name)
+            if options['dry_run']:
+                self.stdout.write(name)
+            else:
+                storage.delete(name)
+            removed += 1
+            freed += size
+        self.stdout.write(self.style.SUCCESS(
+            f'Неиспользуемых файлов: {removed}, '
+            f'освобождено байт: {freed}'))
@@ -0,0 +1,187 @@
+import random
+import time
+from io import BytesIO
+from itertools import accumulate
+
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from recipes.counters import reconcile_counters
+from recipes.models import (Favorite, Ingredient, IngredientForRecipe, Recipe,
+                            ShoppingCart, Tag)
+from recipes.search import update_search_index
+from recipes.shopping_list import rebuild_shopping_lists
+from recipes.snapshots import update_snapshots
+from recipes.storage import recipe_image_storage
+from recipes.versions import bump_version
+from users.models import CustomUser, Subscription
+
+PASSWORD = 'benchmark-password'
+TAGS = (('Завтрак', '#E26C2D', 'breakfast'),
+        ('Обед', '#49B64E', 'lunch'),
+        ('Ужин', '#8775D2', 'dinner'))
+DISHES = ('Суп', 'Салат', 'Пирог', 'Рагу', 'Каша', 'Омлет', 'Плов',
+          'Запеканка', 'Паста', 'Котлеты', 'Блины', 'Борщ')
+ADJECTIVES = ('домашний', 'быстрый', 'летний', 'острый', 'сытный',
+              'праздничный', 'лёгкий', 'бабушкин', 'постный', 'пряный')
+TEXT = ('Нарежьте ингредиенты, смешайте и готовьте на среднем огне. '
+        'Подавайте горячим. ')
+
+
+def zipf_weights(count, exponent=1.1):
+    return list(accumulate(1 / (rank ** exponent)
+                           for rank in range(1, count + 1)))
+
+
+def unique_pairs(count, left, right, right_weights, exclude_self=False):
+    pairs = set()
+    attempts = count * 20
+    while len(pairs) < count and attempts:
+        attempts -= 1
+        first = random.choice(left)
+        second = random.choices(right, cum_weights=right_weights)[0]
+        if exclude_self and first == second:
+            continue
+        pairs.add((first, second))
+    return pairs
+
+
+class Command(BaseCommand):
+    help = 'Заполнение БД синтетическими данными для нагрузочных тестов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8,
+            help='Среднее число ингредиентов в рецепте')
+        parser.add_argument('--favorites', type=int, default=20000)
+        parser.add_argument('--carts', type=int, default=5000)
+        parser.add_argument('--subscriptions', type=int, default=5000)
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Размер пакета при записи в БД')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора случайных чисел')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self.batch_size = options['batch_size']
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredient_ids:
+            raise CommandError(
+                'Нет ингредиентов, сначала выполните load_data')
+        started = time.monotonic()
+        tag_ids = self.create_tags()
+        user_ids = self.create_users(options['users'])
+        recipe_ids = self.create_recipes(
+            options['recipes'], user_ids, tag_ids, ingredient_ids,
+            options['ingredients_per_recipe'])
+        recipe_weights = zipf_weights(len(recipe_ids))
+        self.create_pairs(
+            Favorite, 'recipe_id', options['favorites'],
+            user_ids, recipe_ids, recipe_weights)
+        self.create_pairs(
+            ShoppingCart, 'recipe_id', options['carts'],
+            user_ids, recipe_ids, recipe_weights)
+        author_ids = sorted(set(Recipe.objects.filter(
+            id__in=recipe_ids).values_list('author_id', flat=True)))
+        random.shuffle(author_ids)
+        self.create_pairs(
+            Subscription, 'author_id', options['subscriptions'],
+            user_ids, author_ids, zipf_weights(len(author_ids)),
+            exclude_self=True)
+        rebuild_shopping_lists(batch_size=self.batch_size)
+        reconcile_counters(apps.get_model, batch_size=self.batch_size)
+        bump_version('tags', 'recipes')
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные созданы за {time.monotonic() - started:.1f} с, '
+            f'пароль пользователей: {PASSWORD}'))
+
+    def create_tags(self):
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color})
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        prefix = f'bench{int(time.time())}'
+        CustomUser.objects.bulk_create(
+            (CustomUser(username=f'{prefix}_{index}',
+                        email=f'{prefix}_{index}@example.org',
+                        first_name='Имя', last_name='Фамилия',
+                        password=password)
+             for index in range(count)),
+            batch_size=self.batch_size)
+        user_ids = list(CustomUser.objects.filter(
+            username__startswith=f'{prefix}_').values_list('id', flat=True))
+        self.stdout.write(f'Пользователей: {len(user_ids)}')
+        return user_ids
+
+    def create_recipes(self, count, user_ids, tag_ids, ingredient_ids,
+                       ingredients_per_recipe):
+        output = BytesIO()
+        Image.new('RGB', (640, 480), (226, 108, 45)).save(output, 'JPEG')
+        image = recipe_image_storage.save(
+            'recipes/benchmark.jpg', ContentFile(output.getvalue()))
+        authors = random.choices(
+            user_ids, cum_weights=zipf_weights(len(user_ids)), k=count)
+        last_id = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True).first() or 0
+        Recipe.objects.bulk_create(
+            (Recipe(author_id=author_id,
+                    name=(f'{random.choice(DISHES)} '
+                          f'{random.choice(ADJECTIVES)} {index}'),
+                    text=TEXT * random.randint(1, 8),
+                    cooking_time=max(1, min(300, int(
+                        random.lognormvariate(3.3, 0.6)))),
+                    image=image)
+             for index, author_id in enumerate(authors)),
+            batch_size=self.batch_size)
+        recipe_ids = list(Recipe.objects.filter(
+            id__gt=last_id).values_list('id', flat=True))
+        RecipeTag = Recipe.tags.through
+        RecipeTag.objects.bulk_create(
+            (RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+             for recipe_id in recipe_ids
+             for tag_id in random.sample(
+                 tag_ids, random.randint(1, len(tag_ids)))),
+            batch_size=self.batch_size)
+        ingredient_weights = zipf_weights(len(ingredient_ids), 0.8)
+        rows = 0
+        for start in range(0, len(recipe_ids), self.batch_size):
+            batch = []
+            for recipe_id in recipe_ids[start:start + self.batch_size]:
+                size = max(1, min(len(ingredient_ids), round(
+                    random.gauss(ingredients_per_recipe, 3))))
+                chosen = set(random.choices(
+                    ingredient_ids, cum_weights=ingredient_weights, k=size))
+                batch.extend(
+                    IngredientForRecipe(
+                        recipe_id=recipe_id, ingredient_id=ingredient_id,
+                        amount=random.choice((1, 2, 5, 10, 50, 100, 200)))
+                    for ingredient_id in chosen)
+            IngredientForRecipe.objects.bulk_create(batch)
+            rows += len(batch)
+            update_search_index(recipe_ids[start:start + self.batch_size])
+            update_snapshots(recipe_ids[start:start + self.batch_size])
+        self.stdout.write(
+            f'Рецептов: {len(recipe_ids)}, ингредиентов в рецептах: {rows}')
+        return recipe_ids
+
+    def create_pairs(self, model, field, count, user_ids, target_ids,
+                     target_weights, exclude_self=False):
+        if not user_ids or not target_ids:
+            return
+        pairs = unique_pairs(count, user_ids, target_ids, target_weights,
+                             exclude_self)
+        model.objects.bulk_create(
+            (model(user_id=user_id, **{field: target_id})
+             for user_id, target_id in pairs),
+            batch_size=self.batch_size, ignore_conflicts=True)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {len(pairs)}')
@@ -1,21 +1,113 @@
+import csv
 import json
+import os
+import re
+import time
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 from recipes.models import Ingredient
+from recipes.versions import bump_version
+
+DEFAULT_PATH = 'recipes/data/ingredients.json'
+READ_SIZE = 64 * 1024
+FIELDS = ['name', 'measurement_unit']
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def json_row(row, number):
+    if not isinstance(row, dict) or not all(
+            isinstance(row.get(field), str) for field in FIELDS):
+        raise CommandError(
+            f'Элемент {number}: ожидается объект с полями '
+            'name и measurement_unit')
+    return row['name'], row['measurement_unit']
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается JSON-массив ингредиентов')
+    position = 1
+    number = 0
+    eof = False
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            row, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError('Некорректный JSON-файл')
+            chunk = file.read(READ_SIZE)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        number += 1
+        yield json_row(row, number)
+
+
+def read_csv(file):
+    reader = csv.reader(file)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < 2:
+            raise CommandError(
+                f'Строка {reader.line_num}: ожидается название '
+                'и единица измерения')
+        if reader.line_num == 1 and [
+                value.strip().lower() for value in row[:2]] == FIELDS:
+            continue
+        yield row[0], row[1]
+
+
+READERS = {'.json': read_json, '.csv': read_csv}
 
 
 class Command(BaseCommand):
-    help = 'Загрузка ингридиентов из json файла в БД'
+    help = 'Загрузка ингридиентов из json или csv файла в БД'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default=DEFAULT_PATH,
+            help='Путь к файлу ingredients.json или ingredients.csv')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Размер пакета при записи в БД')
 
     def handle(self, *args, **options):
-        with open('recipes/data/ingredients.json',
-                  'r', encoding='utf-8') as file:
-            json_reader = json.load(file)
-            for row in json_reader:
-                ingredient = Ingredient(
-                    name=row['name'],
-                    measurement_unit=row['measurement_unit'])
-                ingredient.save()
-            self.stdout.write(self.style.SUCCESS(
-                'Ингридиенты загружены в БД'))
+        path = options['path']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются только файлы .json и .csv')
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        before = Ingredient.objects.count()
+        total = 0
+        batch = []
+        with open(path, 'r', encoding='utf-8') as file:
+            for name, measurement_unit in reader(file):
+                batch.append(Ingredient(
+                    name=name.strip(),
+                    measurement_unit=measurement_unit.strip()))
+                if len(batch) >= batch_size:
+                    Ingredient.objects.bulk_create(
+                        batch, ignore_conflicts=True)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+        created = Ingredient.objects.count() - before
+        if created:
+            bump_version('ingredients', 'recipes')
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Прочитано строк: {total}, добавлено: {created}, '
+            f'за {elapsed:.2f} с ({total / max(elapsed, 1e-6):.0f} строк/с)')
+        self.stdout.write(self.style.SUCCESS(
+            'Ингридиенты загружены в БД'))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipes.images import generate_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание миниатюр и WebP-вариантов изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя новые рецепты')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками в секундах')
+
+    def handle(self, *args, **options):
+        failed = set()
+        while True:
+            pending = list(Recipe.objects.filter(
+                image_variants={}).exclude(id__in=failed).values_list(
+                    'id', flat=True))
+            processed = 0
+            for recipe_id in pending:
+                try:
+                    generate_variants(recipe_id)
+                except Exception as error:
+                    failed.add(recipe_id)
+                    self.stderr.write(f'Рецепт {recipe_id}: {error}')
+                else:
+                    processed += 1
+            if processed:
+                self.stdout.write(f'Обработано изображений: {processed}')
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Изображения обработаны'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.shopping_list import rebuild_shopping_lists, verify_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт списков покупок пользователей и сверка с корзинами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help='Только сверить списки покупок, не пересчитывая их')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Размер пакета при записи в БД')
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            rebuild_shopping_lists(batch_size=options['batch_size'])
+            self.stdout.write('Списки покупок пересчитаны')
+        mismatches = verify_shopping_lists()
+        for (user_id, ingredient_id), (stored, live) in sorted(
+                mismatches.items()):
+            self.stdout.write(
+                f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'в таблице {stored}, в корзине {live}')
+        if mismatches:
+            raise CommandError(f'Расхождений: {len(mismatches)}')
+        self.stdout.write(self.style.SUCCESS(
+            'Списки покупок совпадают с корзинами'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.snapshots import SNAPSHOT_BATCH_SIZE, snapshot_recipes
+
+
+class Command(BaseCommand):
+    help = 'Пересборка готовых представлений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Только рецепты без готового представления')
+        parser.add_argument(
+            '--batch-size', type=int, default=SNAPSHOT_BATCH_SIZE,
+            help='Размер пакета при записи в БД')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.order_by('id')
+        if options['missing']:
+            recipes = recipes.filter(snapshot={})
+        snapshots = snapshot_recipes(
+            Recipe, recipes.values_list('id', flat=True),
+            batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Представлений пересобрано: {len(snapshots)}'))
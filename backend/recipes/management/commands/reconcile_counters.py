@@ -0,0 +1,22 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from recipes.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Сверка и исправление счётчиков избранного, корзин и подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, не исправляя их')
+
+    def handle(self, *args, **options):
+        drift = reconcile_counters(apps.get_model,
+                                   dry_run=options['dry_run'])
+        for counter, count in drift.items():
+            self.stdout.write(f'{counter}: расхождений {count}')
+        if options['dry_run']:
+            return
+        self.stdout.write(self.style.SUCCESS('Счётчики исправлены'))
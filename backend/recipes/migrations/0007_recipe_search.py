@@ -0,0 +1,68 @@
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import TextField, Value
+
+INDEX_NAME = 'recipes_recipe_search_vector_gin'
+SEARCH_CONFIG = 'russian'
+
+
+def index_recipes(Recipe, recipe_ids, vendor):
+    ingredient_names = {}
+    for recipe_id, name in (
+            Recipe.ingredients.through.objects
+            .filter(recipe_id__in=recipe_ids)
+            .order_by('id')
+            .values_list('recipe_id', 'ingredient__name')):
+        ingredient_names.setdefault(recipe_id, []).append(name)
+    for recipe_id, name, text in (Recipe.objects
+                                  .filter(id__in=recipe_ids)
+                                  .values_list('id', 'name', 'text')):
+        names = ' '.join(ingredient_names.get(recipe_id, []))
+        document = f'{name}\n{names}\n{text}'.casefold().replace('ё', 'е')
+        fields = {'search_document': document}
+        if vendor == 'postgresql':
+            fields['search_vector'] = (
+                SearchVector('name', weight='A', config=SEARCH_CONFIG)
+                + SearchVector(Value(names, output_field=TextField()),
+                               weight='B', config=SEARCH_CONFIG)
+                + SearchVector('text', weight='C', config=SEARCH_CONFIG))
+        Recipe.objects.filter(id=recipe_id).update(**fields)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON recipes_recipe '
+            'USING gin (search_vector)')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    for start in range(0, len(recipe_ids), 500):
+        index_recipes(Recipe, recipe_ids[start:start + 500],
+                      schema_editor.connection.vendor)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_ingredient_name_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False, verbose_name='Поисковый текст'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
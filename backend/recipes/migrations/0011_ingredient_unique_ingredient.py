@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:40
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientForRecipe = apps.get_model('recipes', 'IngredientForRecipe')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    duplicates = (Ingredient.objects
+                  .values('name', 'measurement_unit')
+                  .annotate(kept_id=Min('id'), total=Count('id'))
+                  .filter(total__gt=1)
+                  .order_by())
+    for duplicate in duplicates:
+        kept_id = duplicate['kept_id']
+        extra_ids = list(Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit'],
+        ).exclude(id=kept_id).values_list('id', flat=True))
+        IngredientForRecipe.objects.filter(
+            ingredient_id__in=extra_ids).update(ingredient_id=kept_id)
+        for item in ShoppingListItem.objects.filter(
+                ingredient_id__in=extra_ids):
+            kept, created = ShoppingListItem.objects.get_or_create(
+                user_id=item.user_id, ingredient_id=kept_id,
+                defaults={'total_amount': item.total_amount})
+            if not created:
+                kept.total_amount += item.total_amount
+                kept.save(update_fields=['total_amount'])
+            item.delete()
+        Ingredient.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_alter_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_ingredients,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('recipes', 'Recipe', 'favorites_count', 'recipes', 'Favorite',
+     'recipe'),
+    ('recipes', 'Recipe', 'in_carts_count', 'recipes', 'ShoppingCart',
+     'recipe'),
+    ('users', 'CustomUser', 'recipes_count', 'recipes', 'Recipe', 'author'),
+    ('users', 'CustomUser', 'subscribers_count', 'users', 'Subscription',
+     'author'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for app, model, field, related_app, related_model, fk in COUNTERS:
+        related = apps.get_model(related_app, related_model)
+        apps.get_model(app, model).objects.update(**{field: Coalesce(
+            Subquery(related.objects.filter(**{fk: OuterRef('pk')})
+                     .order_by()
+                     .values(fk)
+                     .annotate(total=Count('pk'))
+                     .values('total')),
+            Value(0))})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_ingredient_unique_ingredient'),
+        ('users', '0004_customuser_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
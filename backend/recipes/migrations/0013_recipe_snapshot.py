@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+AUTHOR_FIELDS = ('email', 'id', 'username', 'first_name', 'last_name')
+BATCH_SIZE = 1000
+
+
+def build_snapshots(Recipe, recipe_ids):
+    tags = {}
+    for recipe_id, *tag in (Recipe.tags.through.objects
+                            .filter(recipe_id__in=recipe_ids)
+                            .order_by('tag_id')
+                            .values_list('recipe_id', 'tag__id', 'tag__name',
+                                         'tag__color', 'tag__slug')):
+        tags.setdefault(recipe_id, []).append(
+            dict(zip(('id', 'name', 'color', 'slug'), tag)))
+    ingredients = {}
+    for recipe_id, *ingredient in (
+            Recipe.ingredients.through.objects
+            .filter(recipe_id__in=recipe_ids)
+            .order_by('id')
+            .values_list('recipe_id', 'ingredient__id', 'ingredient__name',
+                         'ingredient__measurement_unit', 'amount')):
+        ingredients.setdefault(recipe_id, []).append(
+            dict(zip(('id', 'name', 'measurement_unit', 'amount'),
+                     ingredient)))
+    return [
+        Recipe(id=recipe_id, snapshot={
+            'tags': tags.get(recipe_id, []),
+            'author': dict(zip(AUTHOR_FIELDS, author)),
+            'ingredients': ingredients.get(recipe_id, []),
+        })
+        for recipe_id, *author in (
+            Recipe.objects
+            .filter(id__in=recipe_ids)
+            .values_list('id', *(f'author__{field}'
+                                 for field in AUTHOR_FIELDS)))]
+
+
+def fill_snapshots(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        Recipe.objects.bulk_update(
+            build_snapshots(Recipe, recipe_ids[start:start + BATCH_SIZE]),
+            ['snapshot'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='snapshot',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Готовое представление'),
+        ),
+        migrations.RunPython(fill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:45
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_carts(apps, schema_editor):
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    IngredientForRecipe = apps.get_model('recipes', 'IngredientForRecipe')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    duplicates = list(ShoppingCart.objects.values('user', 'recipe')
+                      .annotate(first=Min('id'), total=Count('id'))
+                      .filter(total__gt=1)
+                      .order_by())
+    if not duplicates:
+        return
+    user_ids = {row['user'] for row in duplicates}
+    recipe_ids = {row['recipe'] for row in duplicates}
+    for row in duplicates:
+        ShoppingCart.objects.filter(
+            user_id=row['user'], recipe_id=row['recipe']
+        ).exclude(id=row['first']).delete()
+    Recipe.objects.filter(id__in=recipe_ids).update(in_carts_count=Coalesce(
+        Subquery(ShoppingCart.objects.filter(recipe=OuterRef('pk'))
+                 .order_by()
+                 .values('recipe')
+                 .annotate(total=Count('pk'))
+                 .values('total')),
+        Value(0)))
+    ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id,
+                         total_amount=total)
+        for user_id, ingredient_id, total in (
+            IngredientForRecipe.objects
+            .filter(recipe__shopping_cart__user__in=user_ids)
+            .values('recipe__shopping_cart__user', 'ingredient')
+            .annotate(total=Sum('amount'))
+            .order_by()
+            .values_list('recipe__shopping_cart__user', 'ingredient',
+                         'total')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_carts,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_shopping_cart'),
+        ),
+    ]
@@ -1,10 +1,13 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import UniqueConstraint
 
 from users.models import CustomUser
 
+from .storage import recipe_image_storage
+
 MAX_LENGTH = 200
 
 
@@ -46,6 +49,9 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ['name']
+        constraints = [UniqueConstraint(
+            fields=['name', 'measurement_unit'],
+            name='unique_ingredient')]
 
     def __str__(self):
         return self.name
@@ -73,6 +79,7 @@ class Recipe(models.Model):
     image = models.ImageField(
         'Изображение',
         upload_to='recipes/',
+        storage=recipe_image_storage,
         blank=False)
     text = models.CharField(
         'Описание',
@@ -82,11 +89,39 @@ class Recipe(models.Model):
         'Время приготовления',
         validators=[MinValueValidator(1), MaxValueValidator(100000)],
         blank=False)
+    favorites_count = models.PositiveIntegerField(
+        'В избранном',
+        default=0,
+        editable=False)
+    in_carts_count = models.PositiveIntegerField(
+        'В списках покупок',
+        default=0,
+        editable=False)
+    image_variants = models.JSONField(
+        'Варианты изображения',
+        default=dict,
+        blank=True,
+        editable=False)
+    snapshot = models.JSONField(
+        'Готовое представление',
+        default=dict,
+        blank=True,
+        editable=False)
+    search_document = models.TextField(
+        'Поисковый текст',
+        blank=True,
+        editable=False)
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False)
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['name']
+        indexes = [models.Index(fields=['name', 'id'],
+                                name='recipe_name_id_idx')]
 
     def __str__(self):
         return self.name
@@ -150,6 +185,49 @@ class ShoppingCart(models.Model):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Список покупок'
         ordering = ['-id']
+        constraints = [UniqueConstraint(
+            fields=['user', 'recipe'],
+            name='unique_shopping_cart')]
 
     def __str__(self):
         return f'Вы добавили "{self.recipe}" в список покупок'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь')
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент')
+    total_amount = models.PositiveIntegerField('Общее количество')
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списка покупок'
+        ordering = ['ingredient__name']
+        constraints = [UniqueConstraint(
+            fields=['user', 'ingredient'],
+            name='unique_shopping_list_item')]
+
+    def __str__(self):
+        return f'{self.ingredient} - {self.total_amount}'
+
+
+class Version(models.Model):
+    name = models.CharField(
+        'Название',
+        max_length=MAX_LENGTH,
+        unique=True)
+    value = models.BigIntegerField('Значение')
+
+    class Meta:
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
@@ -0,0 +1,57 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import F, TextField, Value
+from django.db.models.functions import StrIndex
+
+from .ingredient_index import normalize
+from .models import Recipe
+
+SEARCH_CONFIG = 'russian'
+
+
+def search_vector(ingredient_names):
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(Value(ingredient_names, output_field=TextField()),
+                       weight='B', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='C', config=SEARCH_CONFIG))
+
+
+def index_recipes(recipe_model, recipe_ids):
+    ingredient_names = {}
+    for recipe_id, name in (
+            recipe_model.ingredients.through.objects
+            .filter(recipe_id__in=recipe_ids)
+            .order_by('id')
+            .values_list('recipe_id', 'ingredient__name')):
+        ingredient_names.setdefault(recipe_id, []).append(name)
+    for recipe_id, name, text in (recipe_model.objects
+                                  .filter(id__in=recipe_ids)
+                                  .values_list('id', 'name', 'text')):
+        names = ' '.join(ingredient_names.get(recipe_id, []))
+        fields = {'search_document': normalize(f'{name}\n{names}\n{text}')}
+        if connection.vendor == 'postgresql':
+            fields['search_vector'] = search_vector(names)
+        recipe_model.objects.filter(id=recipe_id).update(**fields)
+
+
+def update_search_index(recipe_ids):
+    index_recipes(Recipe, list(recipe_ids))
+
+
+def search_recipes(queryset, query):
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG,
+                                   search_type='websearch')
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', 'name')
+    terms = normalize(query).split()
+    if not terms:
+        return queryset
+    for term in terms:
+        queryset = queryset.filter(search_document__contains=term)
+    return queryset.annotate(
+        rank=StrIndex('search_document', Value(terms[0]))
+    ).order_by('rank', 'name')
@@ -0,0 +1,131 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from users.models import CustomUser
+
+from .counters import change_counter
+from .models import IngredientForRecipe, Recipe, ShoppingCart, ShoppingListItem
+
+
+def bump_shopping_cart_version(users):
+    users.update(shopping_cart_version=F('shopping_cart_version') + 1)
+
+
+def recipes_amounts(recipe_ids):
+    return Counter(dict(
+        IngredientForRecipe.objects.filter(recipe_id__in=recipe_ids)
+        .values('ingredient_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+        .values_list('ingredient_id', 'total')))
+
+
+def recipe_amounts(recipe_id):
+    return recipes_amounts([recipe_id])
+
+
+def apply_amounts(user_ids, amounts):
+    user_ids = sorted(set(user_ids))
+    amounts = {ingredient_id: amount
+               for ingredient_id, amount in amounts.items() if amount}
+    if not user_ids or not amounts:
+        return
+    with transaction.atomic():
+        list(CustomUser.objects.select_for_update()
+             .filter(pk__in=user_ids).order_by('pk')
+             .values_list('pk', flat=True))
+        items = ShoppingListItem.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=amounts)
+        existing = set(items.values_list('user_id', 'ingredient_id'))
+        items.update(total_amount=Greatest(
+            F('total_amount') + Case(
+                *[When(ingredient_id=ingredient_id, then=Value(amount))
+                  for ingredient_id, amount in amounts.items()],
+                default=Value(0)),
+            Value(0)))
+        ShoppingListItem.objects.bulk_create([
+            ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id,
+                             total_amount=amount)
+            for user_id in user_ids
+            for ingredient_id, amount in amounts.items()
+            if amount > 0 and (user_id, ingredient_id) not in existing])
+        items.filter(total_amount=0).delete()
+
+
+def add_recipe_to_shopping_list(user_id, recipe_id):
+    apply_amounts([user_id], recipe_amounts(recipe_id))
+
+
+def remove_recipe_from_shopping_list(user_id, recipe_id):
+    apply_amounts([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipe_amounts(recipe_id).items()})
+
+
+def add_recipes_to_shopping_list(user_id, recipe_ids):
+    apply_amounts([user_id], recipes_amounts(recipe_ids))
+
+
+def remove_recipes_from_shopping_list(user_id, recipe_ids):
+    apply_amounts([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipes_amounts(recipe_ids).items()})
+
+
+def add_recipes_to_cart(user, recipe_ids):
+    add_recipes_to_shopping_list(user.pk, recipe_ids)
+    bump_shopping_cart_version(CustomUser.objects.filter(pk=user.pk))
+    change_counter(Recipe, recipe_ids, 'in_carts_count', 1)
+
+
+def remove_recipes_from_cart(user, recipe_ids):
+    remove_recipes_from_shopping_list(user.pk, recipe_ids)
+    bump_shopping_cart_version(CustomUser.objects.filter(pk=user.pk))
+    change_counter(Recipe, recipe_ids, 'in_carts_count', -1)
+
+
+def update_recipe_in_shopping_lists(recipe_id, old_amounts):
+    new_amounts = recipe_amounts(recipe_id)
+    new_amounts.subtract(old_amounts)
+    apply_amounts(
+        ShoppingCart.objects.filter(recipe_id=recipe_id)
+        .values_list('user_id', flat=True),
+        new_amounts)
+
+
+def live_shopping_list_totals():
+    return (IngredientForRecipe.objects
+            .filter(recipe__shopping_cart__isnull=False)
+            .values('recipe__shopping_cart__user', 'ingredient')
+            .annotate(total=Sum('amount'))
+            .order_by()
+            .values_list('recipe__shopping_cart__user', 'ingredient',
+                         'total'))
+
+
+@transaction.atomic
+def rebuild_shopping_lists(batch_size=1000):
+    ShoppingListItem.objects.all().delete()
+    ShoppingListItem.objects.bulk_create(
+        (ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id,
+                          total_amount=total)
+         for user_id, ingredient_id, total
+         in live_shopping_list_totals().iterator()),
+        batch_size=batch_size)
+
+
+def verify_shopping_lists():
+    live = {(user_id, ingredient_id): total
+            for user_id, ingredient_id, total
+            in live_shopping_list_totals().iterator()}
+    stored = dict(
+        ((user_id, ingredient_id), total)
+        for user_id, ingredient_id, total
+        in ShoppingListItem.objects.values_list(
+            'user_id', 'ingredient_id', 'total_amount').iterator())
+    return {key: (stored.get(key), live.get(key))
+            for key in live.keys() | stored.keys()
+            if stored.get(key) != live.get(key)}
@@ -0,0 +1,140 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import CustomUser, Subscription
+
+from .counters import change_counter, signals_muted
+from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from .search import update_search_index
+from .shopping_list import (add_recipe_to_shopping_list,
+                            bump_shopping_cart_version,
+                            remove_recipe_from_shopping_list)
+from .snapshots import update_snapshots
+from .versions import bump_version
+
+
+def track_counter(sender, target_model, target_attname, field):
+    def added(sender, instance, created, **kwargs):
+        if created and not signals_muted.get():
+            change_counter(target_model,
+                           [getattr(instance, target_attname)], field, 1)
+
+    def removed(sender, instance, origin=None, **kwargs):
+        target_id = getattr(instance, target_attname)
+        if signals_muted.get() or (
+                isinstance(origin, target_model) and origin.pk == target_id):
+            return
+        change_counter(target_model, [target_id], field, -1)
+
+    post_save.connect(added, sender=sender, weak=False,
+                      dispatch_uid=f'{field}_added')
+    post_delete.connect(removed, sender=sender, weak=False,
+                        dispatch_uid=f'{field}_removed')
+
+
+track_counter(Favorite, Recipe, 'recipe_id', 'favorites_count')
+track_counter(ShoppingCart, Recipe, 'recipe_id', 'in_carts_count')
+track_counter(Recipe, CustomUser, 'author_id', 'recipes_count')
+track_counter(Subscription, CustomUser, 'author_id', 'subscribers_count')
+
+SNAPSHOT_SOURCES = {Tag: 'tags', Ingredient: 'ingredients'}
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    if signals_muted.get():
+        return
+    bump_shopping_cart_version(
+        CustomUser.objects.filter(pk=instance.user_id))
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_added(sender, instance, created, **kwargs):
+    if created and not signals_muted.get():
+        add_recipe_to_shopping_list(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def shopping_cart_removed(sender, instance, **kwargs):
+    if signals_muted.get():
+        return
+    remove_recipe_from_shopping_list(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(sender, instance, created, **kwargs):
+    if not created:
+        bump_shopping_cart_version(CustomUser.objects.filter(
+            shopping_cart__recipe=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if not created:
+        bump_shopping_cart_version(CustomUser.objects.filter(
+            shopping_cart__recipe__ingredients=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_catalog_changed(sender, **kwargs):
+    bump_version('ingredients', 'recipes')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_catalog_changed(sender, **kwargs):
+    bump_version('tags', 'recipes')
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_catalog_changed(sender, **kwargs):
+    bump_version('recipes')
+
+
+@receiver(post_save, sender=CustomUser)
+def author_changed(sender, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        bump_version('recipes')
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_renamed(sender, instance, created, **kwargs):
+    if not created:
+        update_search_index(
+            instance.recipes.values_list('id', flat=True))
+
+
+def snapshot_recipe_ids(instance):
+    return list(Recipe.objects.filter(
+        **{SNAPSHOT_SOURCES[type(instance)]: instance}
+    ).values_list('id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def snapshot_source_changed(sender, instance, created, **kwargs):
+    if not created:
+        update_snapshots(snapshot_recipe_ids(instance))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def snapshot_source_deleting(sender, instance, **kwargs):
+    instance.snapshot_recipe_ids = snapshot_recipe_ids(instance)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def snapshot_source_deleted(sender, instance, **kwargs):
+    update_snapshots(getattr(instance, 'snapshot_recipe_ids', []))
+
+
+@receiver(post_save, sender=CustomUser)
+def author_snapshot_changed(sender, instance, created, update_fields=None,
+                            **kwargs):
+    if not created and (update_fields is None
+                        or set(update_fields) - {'last_login'}):
+        update_snapshots(instance.recipes.values_list('id', flat=True))
@@ -0,0 +1,61 @@
+from .models import Recipe
+
+SNAPSHOT_BATCH_SIZE = 1000
+AUTHOR_FIELDS = ('email', 'id', 'username', 'first_name', 'last_name')
+
+
+def build_snapshots(recipe_model, recipe_ids):
+    tags = {}
+    for recipe_id, *tag in (recipe_model.tags.through.objects
+                            .filter(recipe_id__in=recipe_ids)
+                            .order_by('tag_id')
+                            .values_list('recipe_id', 'tag__id', 'tag__name',
+                                         'tag__color', 'tag__slug')):
+        tags.setdefault(recipe_id, []).append(
+            dict(zip(('id', 'name', 'color', 'slug'), tag)))
+    ingredients = {}
+    for recipe_id, *ingredient in (
+            recipe_model.ingredients.through.objects
+            .filter(recipe_id__in=recipe_ids)
+            .order_by('id')
+            .values_list('recipe_id', 'ingredient__id', 'ingredient__name',
+                         'ingredient__measurement_unit', 'amount')):
+        ingredients.setdefault(recipe_id, []).append(
+            dict(zip(('id', 'name', 'measurement_unit', 'amount'),
+                     ingredient)))
+    snapshots = {}
+    for recipe_id, *author in (
+            recipe_model.objects
+            .filter(id__in=recipe_ids)
+            .values_list('id', *(f'author__{field}'
+                                 for field in AUTHOR_FIELDS))):
+        snapshots[recipe_id] = {
+            'tags': tags.get(recipe_id, []),
+            'author': dict(zip(AUTHOR_FIELDS, author)),
+            'ingredients': ingredients.get(recipe_id, []),
+        }
+    return snapshots
+
+
+def snapshot_recipes(recipe_model, recipe_ids,
+                     batch_size=SNAPSHOT_BATCH_SIZE):
+    recipe_ids = list(recipe_ids)
+    snapshots = {}
+    for start in range(0, len(recipe_ids), batch_size):
+        batch = build_snapshots(recipe_model,
+                                recipe_ids[start:start + batch_size])
+        recipe_model.objects.bulk_update(
+            [recipe_model(id=recipe_id, snapshot=snapshot)
+             for recipe_id, snapshot in batch.items()],
+            ['snapshot'])
+        snapshots.update(batch)
+    return snapshots
+
+
+def update_snapshots(recipe_ids):
+    return snapshot_recipes(Recipe, recipe_ids)
+
+
+def refresh_snapshot(recipe):
+    recipe.snapshot = update_snapshots([recipe.id]).get(recipe.id, {})
+    return recipe
@@ -0,0 +1,21 @@
+import time
+
+from django.db import transaction
+
+from .models import Version
+
+
+def get_version(name):
+    version, _ = Version.objects.get_or_create(
+        name=name, defaults={'value': time.time_ns()})
+    return version.value
+
+
+def bump_version(*names):
+    def bump():
+        version = time.time_ns()
+        Version.objects.bulk_create(
+            [Version(name=name, value=version) for name in names],
+            update_conflicts=True, unique_fields=['name'],
+            update_fields=['value'])
+    transaction.on_commit(bump)
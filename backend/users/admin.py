@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from backend_foodgram.paginators import EstimatedCountPaginator
 from users.models import CustomUser, Subscription
 
 
@@ -8,11 +9,20 @@ from users.models import CustomUser, Subscription
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
     list_display = ('id', 'email', 'username', 'first_name',
-                    'last_name', 'password')
+                    'last_name', 'password', 'recipes_count',
+                    'subscribers_count')
     ordering = ('username',)
-    search_fields = ('email', 'first_name')
+    search_fields = ('email', 'first_name', 'username')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ('user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    autocomplete_fields = ('user', 'author')
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
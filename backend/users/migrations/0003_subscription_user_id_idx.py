@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_customuser_shopping_cart_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['user', 'id'], name='subscription_user_id_idx'),
+        ),
+    ]
@@ -29,6 +29,18 @@ class CustomUser(AbstractUser):
         max_length=150,
         blank=False,
         null=False,)
+    shopping_cart_version = models.PositiveIntegerField(
+        'Версия списка покупок',
+        default=0,
+        editable=False)
+    recipes_count = models.PositiveIntegerField(
+        'Рецептов',
+        default=0,
+        editable=False)
+    subscribers_count = models.PositiveIntegerField(
+        'Подписчиков',
+        default=0,
+        editable=False)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username', 'password']
@@ -61,3 +73,5 @@ class Subscription(models.Model):
         verbose_name = 'подписка'
         verbose_name_plural = 'Подписки'
         unique_together = ('user', 'author')
+        indexes = [models.Index(fields=['user', 'id'],
+                                name='subscription_user_id_idx')]